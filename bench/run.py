@@ -13,16 +13,43 @@ to JSON (bench/results/<timestamp>.json by default) and stores raw logs.
 from __future__ import annotations
 
 import argparse
-import datetime as dt
+import functools
 import json
+import multiprocessing as mp
 import os
+import posixpath
+import select
 import shutil
 import subprocess
-import tempfile
+import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Set
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _encode(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+else:
+    _loads = json.loads
+
+    def _encode(obj: Any) -> str:
+        return json.dumps(obj)
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -49,6 +76,20 @@ def default_candidates_path() -> Path:
     )
 
 
+def parse_core_list(value: str) -> Set[int]:
+    """Parse a taskset-style CPU list such as "0-3,6" into a set of core ids."""
+    cores: Set[int] = set()
+    try:
+        for part in value.split(","):
+            lo, sep, hi = part.strip().partition("-")
+            cores.update(range(int(lo), int(hi if sep else lo) + 1))
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid core list: {value!r}") from exc
+    if not cores:
+        raise argparse.ArgumentTypeError(f"empty core list: {value!r}")
+    return cores
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run Context benchmark harness")
     parser.add_argument(
@@ -117,7 +158,25 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--resume",
         action="store_true",
-        help="Resume existing report (requires --output pointing to existing file)",
+        help="Resume existing report (requires --output pointing to an existing report or its .ndjson sidecar)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Run up to N search commands of a repo concurrently (timings then include contention)",
+    )
+    parser.add_argument(
+        "--repo-parallelism",
+        type=int,
+        default=1,
+        help="Benchmark up to N repos concurrently in worker processes (ignored with --cuda-device)",
+    )
+    parser.add_argument(
+        "--pin-cores",
+        type=parse_core_list,
+        default=None,
+        help="Pin the harness and every benchmarked command to these cores, e.g. 0-3 (Linux only)",
     )
     parser.add_argument(
         "--trace",
@@ -154,13 +213,94 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Search profile to use (e.g. general or targeted/venorus)",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.pin_cores and hasattr(os, "sched_getaffinity"):
+        allowed = os.sched_getaffinity(0)
+        unavailable = args.pin_cores - allowed
+        if unavailable:
+            parser.error(
+                "--pin-cores: cores "
+                + ",".join(map(str, sorted(unavailable)))
+                + " are outside the allowed CPU set "
+                + ",".join(map(str, sorted(allowed)))
+            )
+    return args
 
 
 def load_candidates(path: Path) -> List[Dict[str, Any]]:
     if not path.exists():
         raise FileNotFoundError(f"candidates file not found: {path}")
-    return json.loads(path.read_text())
+    # Fresh dicts on every call: prepare_commands() stores per-run commands on them.
+    return _loads(path.read_bytes())
+
+
+def _open_pidfd(pid: int) -> int | None:
+    """Return a pollable pidfd for `pid` (Linux 5.3+), or None when unavailable."""
+    if not hasattr(os, "pidfd_open") or not hasattr(select, "poll"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
+
+
+# Exec trampoline between the harness and each benchmarked command. Linux
+# carries a process's RSS high-water mark across exec, so a command spawned
+# straight from the harness would report at least the harness's own peak RSS.
+# The trampoline is a fresh small interpreter: it spawns the command,
+# reaps it with wait4(2), writes "<peak RSS KB> <spawn-to-reap ns>" to the fd in
+# argv[1] and exits with the command's status. Timing inside the trampoline
+# keeps its own interpreter startup out of time_ms. If exec fails the error
+# goes to stderr, the RSS is reported as 0 and the exit status is 127.
+_RSS_TRAMPOLINE = """
+import os, signal, sys, time
+fd = int(sys.argv[1])
+os.set_inheritable(fd, False)  # the command itself must not hold the stats pipe
+start = time.perf_counter_ns()
+try:
+    # posix_spawn (vfork+exec on glibc) is cheaper than fork() of the whole
+    # interpreter and raises here if the command cannot be executed.
+    pid = os.posix_spawnp(sys.argv[2], sys.argv[2:], os.environ)
+except OSError as exc:
+    os.write(2, f"{sys.argv[2]}: {exc}\\n".encode())
+    os.write(fd, f"0 {time.perf_counter_ns() - start}".encode())
+    os._exit(127)
+_, status, usage = os.wait4(pid, 0)
+elapsed_ns = time.perf_counter_ns() - start
+# ru_maxrss is reported in KB on Linux but in bytes on macOS.
+rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+os.write(fd, f"{rss} {elapsed_ns}".encode())
+code = os.waitstatus_to_exitcode(status)
+if code < 0:
+    # Die by the same signal; SIGKILL/SIGSTOP handlers cannot be reset.
+    try:
+        signal.signal(-code, signal.SIG_DFL)
+    except (OSError, ValueError):
+        pass
+    os.kill(os.getpid(), -code)
+os._exit(code)
+"""
+
+
+def _reap(process: subprocess.Popen) -> None:
+    """Reap the trampoline via wait4(2) and record its exit status."""
+    _, status, _ = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+
+def _read_child_stats(fd: int) -> tuple[int, float | None]:
+    """Return (peak RSS KB, run time ms) as reported by the trampoline.
+
+    RSS is 0 and the time None if the trampoline reported nothing usable.
+    """
+    try:
+        data = os.read(fd, 64)
+    finally:
+        os.close(fd)
+    fields = data.split()
+    if len(fields) != 2 or not all(f.isdigit() for f in fields):
+        return 0, None
+    return int(fields[0]), int(fields[1]) / 1e6
 
 
 def run_command(
@@ -170,86 +310,118 @@ def run_command(
     interval: int = 30,
     env: Dict[str, str] | None = None,
 ) -> Dict[str, Any]:
-    """Run a command via /usr/bin/time, print progress heartbeat every `interval` seconds."""
+    """Run a command, print progress heartbeat every `interval` seconds.
 
-    time_file = tempfile.NamedTemporaryFile(delete=False)
-    time_file.close()
-    full_cmd = ["/usr/bin/time", "-f", "%M", "-o", time_file.name] + cmd
+    Peak RSS and run time come from _RSS_TRAMPOLINE, which measures the command
+    itself rather than the trampoline around it.
+    """
 
     start = time.perf_counter()
 
-    process = subprocess.Popen(
-        full_cmd,
-        cwd=cwd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        env=env,
-    )
+    rss_read, rss_write = os.pipe()
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "-I", "-S", "-c", _RSS_TRAMPOLINE, str(rss_write), *cmd],
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            pass_fds=(rss_write,),
+        )
+    except BaseException:
+        os.close(rss_read)
+        raise
+    finally:
+        os.close(rss_write)
 
-    stdout_lines: List[str] = []
-    stderr_lines: List[str] = []
+    # Raw bytes: stdout goes straight to the JSON parser and the log files, so there
+    # is no reason to decode, split into lines and re-join it.
+    stdout_chunks: List[bytes] = []
+    stderr_chunks: List[bytes] = []
 
-    def _drain(pipe: Any, sink: List[str]) -> None:
+    def _drain(pipe: Any, sink: List[bytes]) -> None:
         if pipe is None:
             return
         try:
-            for chunk in iter(pipe.readline, ""):
-                if not chunk:
-                    break
-                sink.append(chunk)
+            sink.append(pipe.read())
         finally:
             pipe.close()
 
-    stdout_thread = threading.Thread(target=_drain, args=(process.stdout, stdout_lines))
-    stderr_thread = threading.Thread(target=_drain, args=(process.stderr, stderr_lines))
+    stdout_thread = threading.Thread(
+        target=_drain, args=(process.stdout, stdout_chunks)
+    )
+    stderr_thread = threading.Thread(
+        target=_drain, args=(process.stderr, stderr_chunks)
+    )
     stdout_thread.daemon = True
     stderr_thread.daemon = True
     stdout_thread.start()
     stderr_thread.start()
 
-    last_heartbeat = time.perf_counter()
-    while True:
-        if process.poll() is not None:
-            break
-        now = time.perf_counter()
-        if now - last_heartbeat >= interval:
-            label = progress_label or "cmd"
-            elapsed = now - start
+    label = progress_label or "cmd"
+    # A zero/negative --progress-interval would otherwise spin on heartbeats.
+    interval = max(interval, 1)
+    pidfd = _open_pidfd(process.pid)
+    if pidfd is not None:
+        # The pidfd becomes readable when the child exits, so we sleep in the
+        # kernel until either exit or the next heartbeat is due.
+        try:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            while not poller.poll(interval * 1000):
+                elapsed = time.perf_counter() - start
+                print(f"[progress] {label} running {elapsed:.1f}s", flush=True)
+        finally:
+            os.close(pidfd)
+    else:
+        # Without pidfd, block in wait4() on a helper thread and join it with
+        # the heartbeat interval as timeout: no sleep/poll spinning either way.
+        reaper = threading.Thread(target=_reap, args=(process,))
+        reaper.daemon = True
+        reaper.start()
+        reaper.join(interval)
+        while reaper.is_alive():
+            elapsed = time.perf_counter() - start
             print(f"[progress] {label} running {elapsed:.1f}s", flush=True)
-            last_heartbeat = now
-        time.sleep(0.5)
+            reaper.join(interval)
 
-    process.wait()
+    if process.returncode is None:
+        _reap(process)
+    max_kb, child_ms = _read_child_stats(rss_read)
     stdout_thread.join()
     stderr_thread.join()
 
-    duration_ms = (time.perf_counter() - start) * 1000.0
-    max_kb = 0
-    try:
-        with open(time_file.name, "r", encoding="utf-8") as fh:
-            content = fh.read().strip()
-            if content:
-                digits = [
-                    line for line in content.splitlines() if line.strip().isdigit()
-                ]
-                if digits:
-                    max_kb = int(digits[-1])
-    finally:
-        os.unlink(time_file.name)
+    duration_ms = (
+        child_ms if child_ms is not None else (time.perf_counter() - start) * 1000.0
+    )
 
     return {
         "cmd": cmd,
         "returncode": process.returncode,
-        "stdout": "".join(stdout_lines),
-        "stderr": "".join(stderr_lines),
+        "stdout": stdout_chunks[0] if stdout_chunks else b"",
+        "stderr": stderr_chunks[0] if stderr_chunks else b"",
         "time_ms": duration_ms,
         "max_rss_kb": max_kb,
     }
 
 
-def normalize_relative(path_value: str, repo_root: Path) -> str:
-    repo_root = repo_root.resolve()
+@functools.lru_cache(maxsize=None)
+def _resolve_root(root: str) -> str:
+    return str(Path(root).resolve())
+
+
+@functools.lru_cache(maxsize=8192)
+def _normalize_rel(path_value: str, root: str) -> str:
+    # `root` must already be resolved; result files repeat heavily across
+    # queries, so each distinct path is resolved against the FS only once.
+    if "\\" not in path_value and ".." not in path_value:
+        # Plain POSIX paths relative to (or directly under) the root cannot
+        # escape it, so string normalization is enough and no syscalls run.
+        if not os.path.isabs(path_value):
+            return posixpath.normpath(path_value)
+        if path_value.startswith(root + "/"):
+            return posixpath.normpath(path_value[len(root) + 1 :])
+    repo_root = Path(root)
     candidate = Path(path_value)
     if not candidate.is_absolute():
         candidate = repo_root / candidate
@@ -260,12 +432,25 @@ def normalize_relative(path_value: str, repo_root: Path) -> str:
         return candidate.as_posix()
 
 
+def run_commands(
+    cmds: List[List[str]],
+    jobs: int = 1,
+    env: Dict[str, str] | None = None,
+) -> List[Dict[str, Any]]:
+    """Run independent commands, up to `jobs` at a time; results keep `cmds` order."""
+    if jobs <= 1 or len(cmds) <= 1:
+        return [run_command(cmd, env=env) for cmd in cmds]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(lambda cmd: run_command(cmd, env=env), cmds))
+
+
+def normalize_relative(path_value: str, repo_root: Path) -> str:
+    return _normalize_rel(path_value, _resolve_root(str(repo_root)))
+
+
 def build_relevant_set(relevant_files: List[str], repo_root: Path) -> set[str]:
-    repo_root = repo_root.resolve()
-    normalized = set()
-    for rel in relevant_files:
-        normalized.add(normalize_relative(rel, repo_root))
-    return normalized
+    root = _resolve_root(str(repo_root))
+    return {_normalize_rel(rel, root) for rel in relevant_files}
 
 
 def compute_precision(
@@ -274,9 +459,13 @@ def compute_precision(
     repo_root: Path,
     k: int,
 ) -> Dict[str, Any]:
+    if not results:
+        # Failed or empty searches: nothing to normalize or match.
+        return {"precision_at_k": 0.0, "hits": [], "top_files": []}
     top = results[:k]
     relevant_set = build_relevant_set(relevant_files, repo_root)
-    normalized_top = [normalize_relative(r.get("file", ""), repo_root) for r in top]
+    root = _resolve_root(str(repo_root))
+    normalized_top = [_normalize_rel(r.get("file", ""), root) for r in top]
     hits = [path for path in normalized_top if path in relevant_set]
     precision = len(hits) / len(top) if top else 0.0
     return {
@@ -289,14 +478,64 @@ def compute_precision(
 def evaluate_negative(
     results: List[Dict[str, Any]], repo_root: Path, k: int
 ) -> Dict[str, Any]:
+    if not results:
+        return {"top_files": [], "false_positive": False}
     top = results[:k]
-    normalized = [normalize_relative(r.get("file", ""), repo_root) for r in top]
+    root = _resolve_root(str(repo_root))
+    normalized = [_normalize_rel(r.get("file", ""), root) for r in top]
     return {
         "top_files": normalized,
         "false_positive": bool(normalized),
     }
 
 
+def open_sidecar(path: Path, records: List[Dict[str, Any]]) -> BinaryIO:
+    """Rewrite the per-repo NDJSON sidecar with `records` and open it for appending.
+
+    The rewrite goes through a temp file, so a torn trailing line left by a
+    crashed run is dropped instead of corrupting the next appended record.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        for record in records:
+            fh.write(_encode(record).encode("utf-8") + b"\n")
+    os.replace(tmp, path)
+    return path.open("ab")
+
+
+def append_record(sidecar: BinaryIO, record: Dict[str, Any]) -> None:
+    sidecar.write(_encode(record).encode("utf-8") + b"\n")
+    sidecar.flush()
+
+
+def log_search(log: BinaryIO, kind: str, name: str, result: Dict[str, Any]) -> None:
+    # Output is decoded only here, for the log; scoring parses the raw bytes.
+    append_record(
+        log,
+        {
+            "kind": kind,
+            "name": name,
+            "cmd": result["cmd"],
+            "returncode": result["returncode"],
+            "stdout": result["stdout"].decode("utf-8", errors="replace"),
+            "stderr": result["stderr"].decode("utf-8", errors="replace"),
+        },
+    )
+
+
+def load_sidecar(path: Path) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with path.open("rb") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(_loads(line))
+            except json.JSONDecodeError:
+                print(f"[WARN] {path}:{lineno}: skipping malformed record")
+    return records
+
+
 def ensure_executable(path: Path) -> None:
     if not path.exists():
         raise FileNotFoundError(f"context binary not found at {path}")
@@ -317,6 +556,214 @@ def resolve_cli_path(path: Path) -> Path:
     return path
 
 
+def cli_prefix(args: argparse.Namespace) -> List[str]:
+    cmd = [str(args.cli)]
+    if args.profile:
+        cmd.extend(["--profile", args.profile])
+    cmd.extend(["command", "--json"])
+    return cmd
+
+
+def cli_cmd(args: argparse.Namespace, request: Dict[str, Any]) -> List[str]:
+    return cli_prefix(args) + [_encode(request)]
+
+
+# Search requests only differ in the query string, so the rest of the payload
+# is encoded once per repo and each query is escaped on its own.
+_SEARCH_TEMPLATE = (
+    '{"action":"search","payload":'
+    '{"query":%s,"limit":%d,"project":%s,"trace":%s}}'
+)
+
+
+def search_cmds(
+    args: argparse.Namespace, repo_path: Path, queries: List[str]
+) -> List[List[str]]:
+    prefix = cli_prefix(args)
+    project_json = _encode(str(repo_path))
+    trace_json = "true" if args.trace else "null"
+    return [
+        prefix
+        + [_SEARCH_TEMPLATE % (_encode(query), args.limit, project_json, trace_json)]
+        for query in queries
+    ]
+
+
+def prepare_commands(entries: List[Dict[str, Any]], args: argparse.Namespace) -> None:
+    """Encode every entry's index/search invocations once, before any command runs."""
+    for entry in entries:
+        repo_path = Path(entry["path"]).expanduser().resolve()
+        entry["_index_cmd"] = cli_cmd(
+            args,
+            {"action": "index", "payload": {"path": str(repo_path), "full": True}},
+        )
+        entry["_query_cmds"] = search_cmds(
+            args, repo_path, [q["query"] for q in entry.get("queries", [])]
+        )
+        entry["_negative_cmds"] = search_cmds(
+            args, repo_path, [n["query"] for n in entry.get("negative_examples", [])]
+        )
+
+
+def process_repo(
+    entry: Dict[str, Any],
+    args: argparse.Namespace,
+    timestamp: str,
+    base_env: Dict[str, str],
+) -> Dict[str, Any] | None:
+    """Index and search one candidate repo; None if the repo is missing on disk."""
+    repo_path = Path(entry["path"]).expanduser().resolve()
+    if not repo_path.exists():
+        print(f"[WARN] skip missing repo {repo_path}")
+        return None
+
+    repo_log_dir = args.log_dir / f"{entry['name']}_{timestamp}"
+    repo_log_dir.mkdir(parents=True, exist_ok=True)
+    repo_record: Dict[str, Any] = {
+        "name": entry.get("name"),
+        "path": str(repo_path),
+        "files": entry.get("files"),
+        "language_count": entry.get("language_count"),
+        "index": None,
+        "queries": [],
+        "negative_examples": [],
+    }
+
+    if args.reset_index and not args.skip_index:
+        index_dirs = [
+            repo_path / ".agents/mcp/.context",
+            repo_path / ".agents/mcp/context/.context",
+            repo_path / ".context",
+            repo_path / ".context-finder",
+        ]
+        for index_dir in index_dirs:
+            if index_dir.exists():
+                shutil.rmtree(index_dir)
+
+    if not args.skip_index:
+        idx_result = run_command(
+            entry["_index_cmd"],
+            progress_label=f"index:{entry['name']}",
+            interval=args.progress_interval,
+            env=base_env,
+        )
+        (repo_log_dir / "index_stdout.json").write_bytes(idx_result["stdout"])
+        (repo_log_dir / "index_stderr.log").write_bytes(idx_result["stderr"])
+        parsed_index = {}
+        status_ok = False
+        if idx_result["returncode"] == 0 and idx_result["stdout"].strip():
+            try:
+                parsed_index = _loads(idx_result["stdout"])
+                status_ok = parsed_index.get("status") == "ok"
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                status_ok = False
+        repo_record["index"] = {
+            "time_ms": idx_result["time_ms"],
+            "max_rss_kb": idx_result["max_rss_kb"],
+            "returncode": idx_result["returncode"],
+            "status": parsed_index.get("status"),
+        }
+        if idx_result["returncode"] != 0 or not status_ok:
+            return repo_record
+
+    queries = entry.get("queries", [])
+    negatives = entry.get("negative_examples", [])
+    # Positive and negative searches are independent, so they share one batch.
+    search_results = run_commands(
+        entry["_query_cmds"] + entry["_negative_cmds"],
+        jobs=args.jobs,
+        env=base_env,
+    )
+
+    precision_sum = 0.0
+    negative_fp = 0
+    # One handle per repo instead of two files per search.
+    with (repo_log_dir / "searches.ndjson").open("wb") as search_log:
+        for query, search_result in zip(queries, search_results[: len(queries)]):
+            log_search(search_log, "query", query["query"], search_result)
+
+            parsed: Dict[str, Any] = {}
+            data: Dict[str, Any] = {}
+            if search_result["returncode"] == 0 and search_result["stdout"].strip():
+                try:
+                    parsed = _loads(search_result["stdout"])
+                    if parsed.get("status") == "ok":
+                        data = parsed.get("data", {})
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    parsed = {}
+            precision_info = compute_precision(
+                data.get("results", []),
+                query["relevant_files"],
+                repo_path,
+                args.k,
+            )
+            precision_sum += precision_info["precision_at_k"]
+
+            repo_record["queries"].append(
+                {
+                    "query": query["query"],
+                    "type": query.get("type"),
+                    "difficulty": query.get("difficulty"),
+                    "expected_snippet": query.get("expected_snippet"),
+                    "metrics": {
+                        "time_ms": search_result["time_ms"],
+                        "max_rss_kb": search_result["max_rss_kb"],
+                        "precision_at_k": precision_info["precision_at_k"],
+                        "hits": precision_info["hits"],
+                        "top_files": precision_info["top_files"],
+                        "returncode": search_result["returncode"],
+                    },
+                }
+            )
+
+        for negative, neg_result in zip(negatives, search_results[len(queries) :]):
+            log_search(search_log, "negative", negative["query"], neg_result)
+
+            parsed: Dict[str, Any] = {}
+            data: Dict[str, Any] = {}
+            if neg_result["returncode"] == 0 and neg_result["stdout"].strip():
+                try:
+                    parsed = _loads(neg_result["stdout"])
+                    if parsed.get("status") == "ok":
+                        data = parsed.get("data", {})
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    parsed = {}
+            neg_stats = evaluate_negative(data.get("results", []), repo_path, args.k)
+            negative_fp += int(neg_stats["false_positive"])
+
+            repo_record["negative_examples"].append(
+                {
+                    "query": negative["query"],
+                    "reason": negative.get("reason"),
+                    "metrics": {
+                        "time_ms": neg_result["time_ms"],
+                        "max_rss_kb": neg_result["max_rss_kb"],
+                        "false_positive": neg_stats["false_positive"],
+                        "top_files": neg_stats["top_files"],
+                        "returncode": neg_result["returncode"],
+                    },
+                }
+            )
+
+    repo_record["summary"] = summarize_repo(precision_sum, len(queries), negative_fp)
+    if repo_record["summary"].get("alert"):
+        repo_record["alert"] = repo_record["summary"]["alert"]
+    return repo_record
+
+
+def iter_repo_records(
+    entries: List[Dict[str, Any]],
+    process: Callable[[Dict[str, Any]], Dict[str, Any] | None],
+    parallelism: int,
+) -> Iterator[Dict[str, Any] | None]:
+    """Yield `process(entry)` for each entry, in completion order when parallel."""
+    if parallelism <= 1:
+        yield from map(process, entries)
+        return
+    with mp.get_context("spawn").Pool(parallelism) as pool:
+        yield from pool.imap_unordered(process, entries)
+
+
 def main() -> None:
     args = parse_args()
     args.cli = resolve_cli_path(args.cli)
@@ -324,11 +771,14 @@ def main() -> None:
     candidates = load_candidates(args.candidates)
     args.log_dir.mkdir(parents=True, exist_ok=True)
     results_path = args.output
-    timestamp = dt.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    timestamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
     if results_path is None:
         args.results_dir.mkdir(parents=True, exist_ok=True)
         results_path = args.results_dir / f"bench_{timestamp}.json"
-    elif args.resume and not results_path.exists():
+    # Each finished repo is appended here immediately, so a crashed run can be
+    # resumed without losing the repos it already measured.
+    sidecar_path = results_path.with_suffix(".ndjson")
+    if args.resume and not results_path.exists() and not sidecar_path.exists():
         raise FileNotFoundError(f"Cannot resume: {results_path} does not exist")
 
     default_report: Dict[str, Any] = {
@@ -340,9 +790,14 @@ def main() -> None:
         "repos": [],
     }
 
-    if args.resume and results_path.exists():
+    if args.resume and sidecar_path.exists():
+        print(f"[bench] resume mode: loading {sidecar_path}")
+        report = default_report
+        report["repos"] = load_sidecar(sidecar_path)
+    elif args.resume and results_path.exists():
         print(f"[bench] resume mode: loading {results_path}")
-        report = json.loads(results_path.read_text())
+        report = _loads(results_path.read_bytes())
+        report.setdefault("repos", [])
     else:
         report = default_report
 
@@ -353,6 +808,8 @@ def main() -> None:
     report["embedding_model"] = args.model
     report["profile"] = args.profile or "general"
 
+    # Built once and never mutated after this block: every run_command call,
+    # including --jobs workers, shares this same dict.
     base_env = os.environ.copy()
     if args.model:
         base_env["CONTEXT_EMBEDDING_MODEL"] = args.model
@@ -378,11 +835,10 @@ def main() -> None:
             / "lib",
         )
     )
+    lib_dirs: List[str] = []
     if ort_lib.exists():
         base_env["ORT_LIB_LOCATION"] = str(ort_lib)
-        ld_path = base_env.get("LD_LIBRARY_PATH", "")
-        merged = f"{ort_lib}:{ld_path}" if ld_path else str(ort_lib)
-        base_env["LD_LIBRARY_PATH"] = merged
+        lib_dirs.append(str(ort_lib))
     # NVIDIA pip-installed libs (cuBLAS/cuDNN/cudart)
     nvidia_libs = [
         Path.home() / ".local/lib/python3.12/site-packages/nvidia/cublas/lib",
@@ -391,17 +847,19 @@ def main() -> None:
         Path.home() / ".local/lib/python3.12/site-packages/nvidia/cufft/lib",
         Path.home() / ".local/lib/python3.12/site-packages/nvidia/cudnn/lib",
     ]
-    for libdir in nvidia_libs:
-        if libdir.exists():
-            ld_path = base_env.get("LD_LIBRARY_PATH", "")
-            base_env["LD_LIBRARY_PATH"] = (
-                f"{libdir}:{ld_path}" if ld_path else str(libdir)
-            )
+    # Same precedence as prepending each dir in turn: last listed wins.
+    lib_dirs[:0] = [str(d) for d in reversed(nvidia_libs) if d.exists()]
+    if lib_dirs:
+        ld_path = base_env.get("LD_LIBRARY_PATH", "")
+        base_env["LD_LIBRARY_PATH"] = os.pathsep.join(
+            lib_dirs + [ld_path] if ld_path else lib_dirs
+        )
 
     filtered = candidates
     if args.include:
         include_set = set(args.include)
         filtered = [entry for entry in candidates if entry.get("name") in include_set]
+    prepare_commands(filtered, args)
 
     started = args.start_from is None
     processed_names: Set[str] = set()
@@ -410,6 +868,7 @@ def main() -> None:
         if isinstance(name, str):
             processed_names.add(name)
 
+    pending: List[Dict[str, Any]] = []
     for entry in filtered:
         if not started:
             if entry.get("name") == args.start_from:
@@ -421,238 +880,63 @@ def main() -> None:
         if args.resume and isinstance(repo_name, str) and repo_name in processed_names:
             print(f"[bench] skipping {repo_name} (already processed)")
             continue
-
-        repo_path = Path(entry["path"]).expanduser().resolve()
-        if not repo_path.exists():
-            print(f"[WARN] skip missing repo {repo_path}")
-            continue
-
-        repo_log_dir = args.log_dir / f"{entry['name']}_{timestamp}"
-        repo_log_dir.mkdir(parents=True, exist_ok=True)
-        repo_record: Dict[str, Any] = {
-            "name": entry.get("name"),
-            "path": str(repo_path),
-            "files": entry.get("files"),
-            "language_count": entry.get("language_count"),
-            "index": None,
-            "queries": [],
-            "negative_examples": [],
-        }
-
-        if args.reset_index and not args.skip_index:
-            candidates = [
-                repo_path / ".agents/mcp/.context",
-                repo_path / ".agents/mcp/context/.context",
-                repo_path / ".context",
-                repo_path / ".context-finder",
-            ]
-            for index_dir in candidates:
-                if index_dir.exists():
-                    shutil.rmtree(index_dir)
-
-        if not args.skip_index:
-            idx_cmd = [str(args.cli)]
-            if args.profile:
-                idx_cmd.extend(["--profile", args.profile])
-            idx_cmd.extend(
-                [
-                    "command",
-                    "--json",
-                    json.dumps(
-                        {
-                            "action": "index",
-                            "payload": {"path": str(repo_path), "full": True},
-                        }
-                    ),
-                ]
-            )
-            idx_result = run_command(
-                idx_cmd,
-                progress_label=f"index:{entry['name']}",
-                interval=args.progress_interval,
-                env=base_env,
-            )
-            (repo_log_dir / "index_stdout.json").write_text(
-                idx_result["stdout"], encoding="utf-8"
-            )
-            (repo_log_dir / "index_stderr.log").write_text(
-                idx_result["stderr"], encoding="utf-8"
-            )
-            parsed_index = {}
-            status_ok = False
-            if idx_result["returncode"] == 0 and idx_result["stdout"].strip():
-                try:
-                    parsed_index = json.loads(idx_result["stdout"])
-                    status_ok = parsed_index.get("status") == "ok"
-                except json.JSONDecodeError:
-                    status_ok = False
-            repo_record["index"] = {
-                "time_ms": idx_result["time_ms"],
-                "max_rss_kb": idx_result["max_rss_kb"],
-                "returncode": idx_result["returncode"],
-                "status": parsed_index.get("status"),
-            }
-            if idx_result["returncode"] != 0 or not status_ok:
-                report["repos"].append(repo_record)
-                continue
-
-        for query in entry.get("queries", []):
-            cmd = [str(args.cli)]
-            if args.profile:
-                cmd.extend(["--profile", args.profile])
-            cmd.extend(
-                [
-                    "command",
-                    "--json",
-                    json.dumps(
-                        {
-                            "action": "search",
-                            "payload": {
-                                "query": query["query"],
-                                "limit": args.limit,
-                                "project": str(repo_path),
-                                "trace": args.trace or None,
-                            },
-                        }
-                    ),
-                ]
-            )
-            search_result = run_command(cmd, env=base_env)
-            log_prefix = query["query"].replace(" ", "_")[:50]
-            (repo_log_dir / f"query_{log_prefix}_stdout.json").write_text(
-                search_result["stdout"], encoding="utf-8"
-            )
-            (repo_log_dir / f"query_{log_prefix}_stderr.log").write_text(
-                search_result["stderr"], encoding="utf-8"
-            )
-
-            parsed: Dict[str, Any] = {}
-            data: Dict[str, Any] = {}
-            if search_result["returncode"] == 0 and search_result["stdout"].strip():
-                try:
-                    parsed = json.loads(search_result["stdout"])
-                    if parsed.get("status") == "ok":
-                        data = parsed.get("data", {})
-                except json.JSONDecodeError:
-                    parsed = {}
-            precision_info = compute_precision(
-                data.get("results", []),
-                query["relevant_files"],
-                repo_path,
-                args.k,
-            )
-
-            repo_record["queries"].append(
-                {
-                    "query": query["query"],
-                    "type": query.get("type"),
-                    "difficulty": query.get("difficulty"),
-                    "expected_snippet": query.get("expected_snippet"),
-                    "metrics": {
-                        "time_ms": search_result["time_ms"],
-                        "max_rss_kb": search_result["max_rss_kb"],
-                        "precision_at_k": precision_info["precision_at_k"],
-                        "hits": precision_info["hits"],
-                        "top_files": precision_info["top_files"],
-                        "returncode": search_result["returncode"],
-                    },
-                }
-            )
-
-        for negative in entry.get("negative_examples", []):
-            cmd = [str(args.cli)]
-            if args.profile:
-                cmd.extend(["--profile", args.profile])
-            cmd.extend(
-                [
-                    "command",
-                    "--json",
-                    json.dumps(
-                        {
-                            "action": "search",
-                            "payload": {
-                                "query": negative["query"],
-                                "limit": args.limit,
-                                "project": str(repo_path),
-                                "trace": args.trace or None,
-                            },
-                        }
-                    ),
-                ]
-            )
-            neg_result = run_command(cmd, env=base_env)
-            log_prefix = negative["query"].replace(" ", "_")[:50]
-            (repo_log_dir / f"negative_{log_prefix}_stdout.json").write_text(
-                neg_result["stdout"], encoding="utf-8"
-            )
-            (repo_log_dir / f"negative_{log_prefix}_stderr.log").write_text(
-                neg_result["stderr"], encoding="utf-8"
-            )
-
-            parsed: Dict[str, Any] = {}
-            data: Dict[str, Any] = {}
-            if neg_result["returncode"] == 0 and neg_result["stdout"].strip():
-                try:
-                    parsed = json.loads(neg_result["stdout"])
-                    if parsed.get("status") == "ok":
-                        data = parsed.get("data", {})
-                except json.JSONDecodeError:
-                    parsed = {}
-            neg_stats = evaluate_negative(data.get("results", []), repo_path, args.k)
-
-            repo_record["negative_examples"].append(
-                {
-                    "query": negative["query"],
-                    "reason": negative.get("reason"),
-                    "metrics": {
-                        "time_ms": neg_result["time_ms"],
-                        "max_rss_kb": neg_result["max_rss_kb"],
-                        "false_positive": neg_stats["false_positive"],
-                        "top_files": neg_stats["top_files"],
-                        "returncode": neg_result["returncode"],
-                    },
-                }
-            )
-
-        repo_record["summary"] = summarize_repo(repo_record)
-        if repo_record["summary"].get("alert"):
-            repo_record["alert"] = repo_record["summary"]["alert"]
-
-        report.setdefault("repos", []).append(repo_record)
         if isinstance(repo_name, str):
             processed_names.add(repo_name)
+        pending.append(entry)
+
+    if args.pin_cores:
+        # Set once on the harness: children (and pool workers) inherit the
+        # mask, which avoids a preexec_fn that is unsafe with --jobs threads.
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, args.pin_cores)
+            except OSError as exc:
+                print(f"[WARN] --pin-cores: cannot set CPU affinity ({exc}); ignoring")
+        else:
+            print("[WARN] --pin-cores is only supported on Linux; ignoring")
+
+    parallelism = args.repo_parallelism
+    if parallelism > 1 and args.cuda_device is not None:
+        print("[bench] --cuda-device set: processing repos serially to avoid GPU OOM")
+        parallelism = 1
+    process = functools.partial(
+        process_repo, args=args, timestamp=timestamp, base_env=base_env
+    )
+
+    sidecar = open_sidecar(sidecar_path, report["repos"])
+    finished: List[Dict[str, Any]] = []
+    for repo_record in iter_repo_records(pending, process, parallelism):
+        if repo_record is None:
+            continue
+        finished.append(repo_record)
+        append_record(sidecar, repo_record)
+    sidecar.close()
+    # Workers finish in any order; keep the report in candidate order.
+    rank = {entry.get("name"): i for i, entry in enumerate(pending)}
+    finished.sort(key=lambda record: rank.get(record.get("name"), len(rank)))
+    report["repos"].extend(finished)
 
     report["summary"] = build_summary(report)
-    results_path.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    results_path.write_text(_dumps(report), encoding="utf-8")
     print(f"Benchmark report saved to {results_path}")
 
 
-def summarize_repo(repo_record: Dict[str, Any]) -> Dict[str, Any]:
-    queries = repo_record.get("queries", [])
-    precision_values = [
-        q.get("metrics", {}).get("precision_at_k", 0.0)
-        for q in queries
-        if isinstance(q, dict)
-    ]
-    avg_precision = (
-        sum(precision_values) / len(precision_values) if precision_values else 0.0
-    )
-
-    neg_examples = repo_record.get("negative_examples", [])
-    false_positive = sum(
-        1 for n in neg_examples if n.get("metrics", {}).get("false_positive")
-    )
+def summarize_repo(
+    precision_sum: float, query_count: int, negative_fp: int
+) -> Dict[str, Any]:
+    """Build a repo summary from totals accumulated while scoring its searches."""
+    avg_precision = precision_sum / query_count if query_count else 0.0
 
     alerts = []
-    if avg_precision < 0.9 and queries:
+    if avg_precision < 0.9 and query_count:
         alerts.append("precision<0.9")
-    if false_positive > 0:
+    if negative_fp > 0:
         alerts.append("false positives")
 
     return {
         "avg_precision_at_k": avg_precision,
-        "query_count": len(queries),
-        "negative_fp": false_positive,
+        "query_count": query_count,
+        "negative_fp": negative_fp,
         "alert": "; ".join(alerts),
     }
 
@@ -13,30 +13,111 @@ Examples:
 Notes:
   - Defaults to downloading into ./models (or $CONTEXT_MODEL_DIR).
   - For HuggingFace sources, requires: python -m pip install huggingface_hub
+  - URL sources reuse HTTP connections when urllib3 is installed (optional).
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
 import hashlib
 import json
+import mmap
 import os
 import shutil
 import sys
 import tempfile
+import threading
 import urllib.request
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, NamedTuple
 
+try:
+    import urllib3  # type: ignore
+except ModuleNotFoundError:  # optional: connection reuse for URL assets
+    urllib3 = None
 
-@dataclass(frozen=True)
-class Asset:
+try:
+    import blake3  # type: ignore
+except ModuleNotFoundError:  # optional: fast multi-threaded verification
+    blake3 = None
+
+try:
+    import orjson  # type: ignore
+except ModuleNotFoundError:  # optional: faster manifest parsing
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Sidecar in the model dir remembering files already verified against the
+# manifest, keyed by relative path and invalidated by size/mtime changes.
+VERIFIED_CACHE_NAME = ".verified.json"
+
+# Default chunk size for manifest `chunk_sha256s` lists (override per asset
+# with `chunk_size`).
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Sources that declare both `url` and `size` above this are fetched as
+# parallel HTTP Range requests (needs urllib3) instead of one stream.
+RANGE_CHUNK_SIZE = 16 * 1024 * 1024
+RANGE_WORKERS = 8
+
+
+def _env_io_buf(default: int) -> int:
+    raw = os.environ.get("CONTEXT_IO_BUF", "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise SystemExit(
+            f"CONTEXT_IO_BUF must be a positive byte count (e.g. 4194304), got {raw!r}"
+        )
+    return value
+
+
+# Read sizes. Network and copy reads use a large buffer (fewer syscalls, in
+# line with socket buffers and disk readahead; override with CONTEXT_IO_BUF).
+# Pure hashing reads stay small so each chunk is still in L2 when sha256
+# runs over it.
+_IO_BUF = _env_io_buf(4 * 1024 * 1024)
+_HASH_BUF = 256 * 1024
+
+
+class Asset(NamedTuple):
     local_rel_path: str
     sha256: str
     source: dict[str, Any]
+    blake3: str | None = None
+    chunk_sha256s: tuple[str, ...] | None = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    # Validated destination under the model dir (set by parse_assets).
+    local_path: Path | None = None
+
+
+# Shared keep-alive pool so URL assets on the same host reuse TCP/TLS
+# connections across downloads (and across worker threads).
+_HTTP = (
+    urllib3.PoolManager(
+        num_pools=4, maxsize=16, retries=urllib3.Retry(3, backoff_factor=0.3)
+    )
+    if urllib3 is not None
+    else None
+)
 
+# Downloads run on worker threads; keep their log lines whole.
+_PRINT_LOCK = threading.Lock()
 
+
+def log(message: str) -> None:
+    with _PRINT_LOCK:
+        print(message, flush=True)
+
+
+@functools.lru_cache(maxsize=None)
 def repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
@@ -49,40 +130,94 @@ def default_model_dir(root: Path) -> Path:
 
 
 def safe_join(base: Path, rel: str) -> Path:
-    rel_path = Path(rel)
-    if rel_path.is_absolute() or ".." in rel_path.parts:
+    # Pure string check, no syscalls: the model dir itself is trusted, so it
+    # is enough that the normalized relative path cannot climb out of it.
+    norm = os.path.normpath(rel)
+    if os.path.isabs(norm) or norm == ".." or norm.startswith(".." + os.sep):
         raise ValueError(
-            f"asset path must be relative and must not contain '..': {rel}"
+            f"asset path must be relative and stay inside the model dir: {rel}"
         )
-
-    base_resolved = base.resolve()
-    full = (base_resolved / rel_path).resolve()
-    try:
-        full.relative_to(base_resolved)
-    except ValueError as exc:
-        raise ValueError(f"asset path escapes model dir: {rel}") from exc
-    return full
+    return base / norm
 
 
 def sha256_file(path: Path) -> str:
-    digest = hashlib.sha256()
     with path.open("rb") as fh:
-        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+: C-level readinto loop, no per-chunk bytes objects.
+            return hashlib.file_digest(fh, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: fh.read(_HASH_BUF), b""):
             digest.update(chunk)
     return digest.hexdigest()
 
 
+def copy_hashed(src: Any, dst: Any, digest: Any) -> None:
+    while True:
+        chunk = src.read(_IO_BUF)
+        if not chunk:
+            break
+        dst.write(chunk)
+        digest.update(chunk)
+
+
+def chunked_sha256_matches(
+    path: Path, expected: tuple[str, ...], chunk_size: int
+) -> bool:
+    """Verify fixed-size chunks of `path` in parallel; stop at the first mismatch."""
+    size = path.stat().st_size
+    if -(-size // chunk_size) != len(expected):
+        return False
+    mismatch = threading.Event()
+    with path.open("rb") as fh:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm:
+        view = memoryview(mm)
+
+        def check(index: int) -> None:
+            if mismatch.is_set():
+                return
+            # hashlib releases the GIL on large buffers, so chunks hash on all cores.
+            chunk = view[index * chunk_size : (index + 1) * chunk_size]
+            if hashlib.sha256(chunk).hexdigest() != expected[index]:
+                mismatch.set()
+
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                list(pool.map(check, range(len(expected))))
+        finally:
+            view.release()
+    return not mismatch.is_set()
+
+
+def verify_file(path: Path, asset: Asset) -> bool:
+    """Check `path` against the fastest digest the manifest provides for `asset`."""
+    if asset.chunk_sha256s:
+        return chunked_sha256_matches(path, asset.chunk_sha256s, asset.chunk_size)
+    if asset.blake3 and blake3 is not None:
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        hasher.update_mmap(str(path))
+        return hasher.hexdigest() == asset.blake3
+    return sha256_file(path) == asset.sha256
+
+
 def download_url(url: str, out_path: Path, expected_sha256: str | None) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with urllib.request.urlopen(url) as resp:  # noqa: S310
-        with out_path.open("wb") as fh:
-            digest = hashlib.sha256()
-            while True:
-                chunk = resp.read(1024 * 1024)
-                if not chunk:
-                    break
-                fh.write(chunk)
-                digest.update(chunk)
+    digest = hashlib.sha256()
+    # The response status is checked before out_path is created, so HTTP
+    # errors leave no empty file behind.
+    if _HTTP is not None and url.startswith(("http://", "https://")):
+        resp = _HTTP.request("GET", url, preload_content=False)
+        try:
+            if resp.status >= 400:
+                raise ValueError(f"HTTP {resp.status} for {url}")
+            with out_path.open("wb") as fh:
+                copy_hashed(resp, fh, digest)
+        finally:
+            resp.release_conn()
+    else:
+        with urllib.request.urlopen(url) as resp:  # noqa: S310
+            with out_path.open("wb") as fh:
+                copy_hashed(resp, fh, digest)
     if (
         expected_sha256 is not None
         and expected_sha256
@@ -91,6 +226,99 @@ def download_url(url: str, out_path: Path, expected_sha256: str | None) -> None:
         raise ValueError(f"sha256 mismatch for {url}")
 
 
+def download_url_ranged(url: str, out_path: Path, size: int, asset: Asset) -> None:
+    """Fetch `url` as parallel byte ranges written in place with pwrite.
+
+    When the manifest has `chunk_sha256s`, ranges follow `chunk_size` and each
+    one is checked as it arrives; otherwise the whole file is hashed once the
+    ranges are done. Servers that ignore Range get a single-stream download.
+    """
+    assert _HTTP is not None
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    chunk_size = asset.chunk_size if asset.chunk_sha256s else RANGE_CHUNK_SIZE
+    ranges = [
+        (start, min(start + chunk_size, size) - 1)
+        for start in range(0, size, chunk_size)
+    ]
+    if asset.chunk_sha256s and len(asset.chunk_sha256s) != len(ranges):
+        raise ValueError(f"chunk_sha256s does not match size for {url}")
+    try:
+        if not fetch_ranges(url, out_path, size, ranges, asset.chunk_sha256s):
+            log(f"[download] {url} ignores Range requests; using a single stream")
+            download_url(url, out_path, asset.sha256 or None)
+            return
+        if asset.chunk_sha256s or not asset.sha256:
+            return
+        if sha256_file(out_path) != asset.sha256:
+            raise ValueError(f"sha256 mismatch for {url}")
+    except BaseException:
+        # The .tmp file was preallocated to full size; don't leave it behind.
+        out_path.unlink(missing_ok=True)
+        raise
+
+
+def fetch_ranges(
+    url: str,
+    out_path: Path,
+    size: int,
+    ranges: list[tuple[int, int]],
+    chunk_sha256s: tuple[str, ...] | None,
+) -> bool:
+    """Download `ranges` of `url` into `out_path`; False if the server ignores Range."""
+    assert _HTTP is not None
+    unsupported = threading.Event()
+    fd = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+
+        def fetch_range(index: int) -> None:
+            if unsupported.is_set():
+                return
+            start, end = ranges[index]
+            digest = hashlib.sha256()
+            offset = start
+            resp = _HTTP.request(
+                "GET",
+                url,
+                headers={"Range": f"bytes={start}-{end}"},
+                preload_content=False,
+            )
+            try:
+                if resp.status == 200:
+                    # Whole body instead of a range: drop the connection
+                    # rather than reading (or pooling) the full response.
+                    unsupported.set()
+                    resp.close()
+                    return
+                if resp.status != 206:
+                    raise ValueError(f"HTTP {resp.status} for ranged GET of {url}")
+                content_range = resp.headers.get("Content-Range", "")
+                total = content_range.rpartition("/")[2]
+                if total != "*" and total != str(size):
+                    raise ValueError(
+                        f"size mismatch for {url}: manifest says {size}, "
+                        f"server sent Content-Range {content_range!r}"
+                    )
+                for chunk in resp.stream(_IO_BUF):
+                    os.pwrite(fd, chunk, offset)
+                    digest.update(chunk)
+                    offset += len(chunk)
+            finally:
+                resp.release_conn()
+            if offset != end + 1:
+                raise ValueError(f"short read for bytes {start}-{end} of {url}")
+            expected = chunk_sha256s[index] if chunk_sha256s else None
+            if expected is not None and digest.hexdigest() != expected:
+                raise ValueError(f"chunk sha256 mismatch at chunk {index} for {url}")
+
+        with ThreadPoolExecutor(max_workers=RANGE_WORKERS) as pool:
+            list(pool.map(fetch_range, range(len(ranges))))
+    finally:
+        os.close(fd)
+    return not unsupported.is_set()
+
+
+@functools.lru_cache(maxsize=None)
 def try_import_hf() -> Any:
     try:
         from huggingface_hub import hf_hub_download  # type: ignore
@@ -126,20 +354,109 @@ def download_huggingface(
             )
         )
         tmp_local = out_path.with_name(out_path.name + ".tmp")
-        shutil.copy2(downloaded, tmp_local)
-        if expected_sha256:
-            actual = sha256_file(tmp_local)
-            if actual != expected_sha256:
-                tmp_local.unlink(missing_ok=True)
-                raise ValueError(
-                    f"sha256 mismatch for {repo_id}@{revision}:{filename} (expected {expected_sha256}, got {actual})"
-                )
+        if not expected_sha256:
+            # Nothing to hash: shutil.copyfile copies in-kernel (sendfile on
+            # Linux, fcopyfile on macOS) without a userspace read/write loop.
+            shutil.copyfile(downloaded, tmp_local)
+            os.replace(tmp_local, out_path)
+            return
+        # Hash while copying out of the HF temp dir instead of re-reading the
+        # copy afterwards: one pass over the bytes instead of two.
+        digest = hashlib.sha256()
+        with downloaded.open("rb") as src, tmp_local.open("wb") as dst:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            copy_hashed(src, dst, digest)
+        actual = digest.hexdigest()
+        if actual != expected_sha256:
+            tmp_local.unlink(missing_ok=True)
+            raise ValueError(
+                f"sha256 mismatch for {repo_id}@{revision}:{filename} (expected {expected_sha256}, got {actual})"
+            )
         os.replace(tmp_local, out_path)
 
 
+def fetch_asset(job: tuple[Asset, Path, str]) -> None:
+    asset, local, expected = job
+    source_type = asset.source.get("type")
+    url = asset.source.get("url")
+    size = asset.source.get("size")
+    if (
+        _HTTP is not None
+        and isinstance(url, str)
+        and url.startswith(("http://", "https://"))
+        and isinstance(size, int)
+        and size > RANGE_CHUNK_SIZE
+    ):
+        log(f"[download] {asset.local_rel_path} from {url} (ranged)")
+        tmp_local = local.with_name(local.name + ".tmp")
+        checked = asset._replace(
+            sha256=expected, chunk_sha256s=asset.chunk_sha256s if expected else None
+        )
+        download_url_ranged(url, tmp_local, size, checked)
+        os.replace(tmp_local, local)
+    elif source_type == "huggingface":
+        repo = str(asset.source.get("repo"))
+        revision = str(asset.source.get("revision", "main"))
+        filename = str(asset.source.get("filename"))
+        log(f"[download] {asset.local_rel_path} from hf:{repo}@{revision}:{filename}")
+        download_huggingface(repo, revision, filename, local, expected)
+    elif source_type == "url":
+        url = str(asset.source.get("url"))
+        log(f"[download] {asset.local_rel_path} from {url}")
+        tmp_local = local.with_name(local.name + ".tmp")
+        download_url(url, tmp_local, expected or None)
+        os.replace(tmp_local, local)
+
+
+def fsync_dir(path: Path) -> None:
+    """Make renames into `path` durable (no-op where directories can't be opened)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def load_verified_cache(model_dir: Path) -> dict[str, dict[str, Any]]:
+    path = model_dir / VERIFIED_CACHE_NAME
+    try:
+        cache = _loads(path.read_bytes())
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_verified_cache(model_dir: Path, cache: dict[str, dict[str, Any]]) -> None:
+    path = model_dir / VERIFIED_CACHE_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(cache, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def cached_as_verified(
+    cache: dict[str, dict[str, Any]], rel: str, st: os.stat_result, sha256: str
+) -> bool:
+    entry = cache.get(rel)
+    return (
+        isinstance(entry, dict)
+        and entry.get("size") == st.st_size
+        and entry.get("mtime_ns") == st.st_mtime_ns
+        and entry.get("sha256") == sha256
+    )
+
+
+def remember_verified(
+    cache: dict[str, dict[str, Any]], rel: str, path: Path, sha256: str
+) -> None:
+    st = path.stat()
+    cache[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+
+
 def load_manifest(path: Path) -> dict[str, Any]:
-    raw = path.read_text(encoding="utf-8")
-    manifest = json.loads(raw)
+    manifest = _loads(path.read_bytes())
     if manifest.get("schema_version") != 1:
         raise ValueError("Unsupported manifest schema_version (expected 1)")
     models = manifest.get("models")
@@ -148,8 +465,11 @@ def load_manifest(path: Path) -> dict[str, Any]:
     return manifest
 
 
-def parse_assets(manifest: dict[str, Any]) -> dict[str, list[Asset]]:
+def parse_assets(manifest: dict[str, Any], model_dir: Path) -> dict[str, list[Asset]]:
+    """Parse and path-check every asset up front, before anything is downloaded."""
+    base_resolved = model_dir.resolve()
     out: dict[str, list[Asset]] = {}
+    errors: list[str] = []
     for model in manifest.get("models", []):
         model_id = model.get("id")
         if not isinstance(model_id, str) or not model_id:
@@ -161,8 +481,37 @@ def parse_assets(manifest: dict[str, Any]) -> dict[str, list[Asset]]:
             source = asset.get("source")
             if not isinstance(local_rel, str) or not isinstance(source, dict):
                 continue
-            assets.append(Asset(local_rel_path=local_rel, sha256=sha, source=source))
+            b3 = str(asset.get("blake3", "")).strip().lower() or None
+            chunks = asset.get("chunk_sha256s")
+            chunk_sha256s = (
+                tuple(str(c).strip().lower() for c in chunks)
+                if isinstance(chunks, list) and chunks
+                else None
+            )
+            chunk_size = asset.get("chunk_size")
+            try:
+                local_path = safe_join(base_resolved, local_rel)
+            except ValueError as exc:
+                errors.append(f"{model_id}: {exc}")
+                continue
+            assets.append(
+                Asset(
+                    local_rel_path=local_rel,
+                    sha256=sha,
+                    source=source,
+                    blake3=b3,
+                    chunk_sha256s=chunk_sha256s,
+                    chunk_size=(
+                        chunk_size
+                        if isinstance(chunk_size, int) and chunk_size > 0
+                        else DEFAULT_CHUNK_SIZE
+                    ),
+                    local_path=local_path,
+                )
+            )
         out[model_id] = assets
+    if errors:
+        raise ValueError("Invalid asset paths in manifest:\n  " + "\n  ".join(errors))
     return out
 
 
@@ -206,6 +555,12 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Skip sha256 verification (faster, less safe)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Parallel downloads (defaults to min(8, number of assets to fetch))",
+    )
     return parser.parse_args()
 
 
@@ -234,7 +589,7 @@ def main() -> int:
                 print(f"{mid}{suffix}")
         return 0
 
-    assets_by_model = parse_assets(manifest)
+    assets_by_model = parse_assets(manifest, model_dir)
     requested = []
     if args.all:
         requested = sorted(assets_by_model.keys())
@@ -258,46 +613,68 @@ def main() -> int:
     ).exists():
         shutil.copy2(manifest_path, model_dir / "manifest.json")
 
+    verified = load_verified_cache(model_dir)
+    verified_before = dict(verified)
+
+    jobs: list[tuple[Asset, Path, str]] = []
+    queued: set[Path] = set()
     for model_id in requested:
         assets = assets_by_model.get(model_id)
         if not assets:
             print(f"[WARN] unknown model id: {model_id}", file=sys.stderr)
             continue
         for asset in assets:
-            local = safe_join(model_dir, asset.local_rel_path)
+            local = asset.local_path
+            assert local is not None
             expected = asset.sha256 if verify else ""
 
-            if local.exists() and not args.force:
+            if args.force:
+                # Forced assets are re-fetched; entries for other models stay.
+                verified.pop(asset.local_rel_path, None)
+            elif local.exists():
                 if not verify or not expected:
                     print(f"[skip] {asset.local_rel_path} (exists)")
                     continue
-                actual = sha256_file(local)
-                if actual == expected:
-                    print(f"[skip] {asset.local_rel_path} (sha256 ok)")
+                rel = asset.local_rel_path
+                if cached_as_verified(verified, rel, local.stat(), expected):
+                    print(f"[skip] {rel} (sha256 ok, cached)")
                     continue
-                print(f"[re-download] {asset.local_rel_path} (sha256 mismatch)")
+                if verify_file(local, asset):
+                    remember_verified(verified, rel, local, expected)
+                    print(f"[skip] {rel} (sha256 ok)")
+                    continue
+                verified.pop(rel, None)
+                print(f"[re-download] {rel} (sha256 mismatch)")
 
             source_type = asset.source.get("type")
-            if source_type == "huggingface":
-                repo = str(asset.source.get("repo"))
-                revision = str(asset.source.get("revision", "main"))
-                filename = str(asset.source.get("filename"))
-                print(
-                    f"[download] {asset.local_rel_path} from hf:{repo}@{revision}:{filename}"
+            if source_type not in ("huggingface", "url"):
+                raise ValueError(
+                    f"Unsupported source type: {source_type!r} for {asset.local_rel_path}"
                 )
-                download_huggingface(repo, revision, filename, local, expected)
-                continue
-            if source_type == "url":
-                url = str(asset.source.get("url"))
-                print(f"[download] {asset.local_rel_path} from {url}")
-                tmp_local = local.with_name(local.name + ".tmp")
-                download_url(url, tmp_local, expected if verify else None)
-                os.replace(tmp_local, local)
+            if local in queued:
+                # Shared by several requested models; parallel jobs must not
+                # race on the same .tmp file.
                 continue
+            queued.add(local)
+            jobs.append((asset, local, expected))
 
-            raise ValueError(
-                f"Unsupported source type: {source_type!r} for {asset.local_rel_path}"
-            )
+    # Downloads are network-bound, so threads overlap them despite the GIL.
+    try:
+        if jobs:
+            workers = max(1, args.jobs or min(8, len(jobs)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(fetch_asset, jobs))
+            # One directory fsync per destination dir, after all renames into
+            # it, so a crash cannot roll back a finished download.
+            for directory in sorted({local.parent for _, local, _ in jobs}):
+                fsync_dir(directory)
+            # Downloads with an expected sha256 were verified while writing.
+            for asset, local, expected in jobs:
+                if expected:
+                    remember_verified(verified, asset.local_rel_path, local, expected)
+    finally:
+        if verified != verified_before:
+            save_verified_cache(model_dir, verified)
 
     print(f"[ok] model_dir={model_dir}")
     return 0
@@ -3,15 +3,71 @@ from __future__ import annotations
 
 import argparse
 import json
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
-
-
-def percentile(sorted_values: List[int], pct: int) -> int:
-    if not sorted_values:
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+try:
+    import orjson  # type: ignore
+except ModuleNotFoundError:  # optional: faster parsing of large zoo reports
+    orjson = None
+
+try:
+    import ijson  # type: ignore
+except ModuleNotFoundError:  # optional: stream large reports instead of loading them
+    ijson = None
+
+try:
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # optional: vectorized reductions for large reports
+    np = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Repos per task when --workers > 1: large enough to amortize pickling each
+# batch to a worker, small enough to spread a report across the pool.
+REPO_BATCH_SIZE = 64
+
+
+def percentile(sorted_values: Sequence[int], pct: int) -> int:
+    if len(sorted_values) == 0:
         return 0
     idx = (len(sorted_values) - 1) * pct // 100
-    return sorted_values[idx]
+    return int(sorted_values[idx])
+
+
+def latency_stats(latencies: List[int]) -> Tuple[int, int, int]:
+    if not latencies:
+        return 0, 0, 0
+    if np is not None:
+        # O(n) selection of just the two ranks we report instead of a full sort.
+        arr = np.asarray(latencies, dtype=np.int64)
+        k50 = (len(arr) - 1) * 50 // 100
+        k95 = (len(arr) - 1) * 95 // 100
+        part = np.partition(arr, [k50, k95])
+        return int(part[k50]), int(part[k95]), int(arr.max())
+    ordered = sorted(latencies)
+    return percentile(ordered, 50), percentile(ordered, 95), ordered[-1]
+
+
+def mean_and_negatives(values: List[float]) -> Tuple[Optional[float], int]:
+    if not values:
+        return None, 0
+    if np is not None:
+        arr = np.asarray(values, dtype=np.float64)
+        return float(arr.mean()), int(np.count_nonzero(arr < 0.0))
+    return sum(values) / len(values), sum(1 for v in values if v < 0.0)
 
 
 @dataclass(frozen=True)
@@ -36,13 +92,54 @@ class ZooSummary:
 
 
 def parse_report(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def summarize(report: Dict[str, Any]) -> ZooSummary:
-    repos: List[Dict[str, Any]] = list(report.get("repos", []))
-
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
+
+def iter_report_repos(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield `repos[*]` from a report, streaming it when ijson is installed."""
+    if ijson is None:
+        yield from parse_report(path).get("repos", [])
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "repos.item", use_float=True)
+
+
+@dataclass
+class ZooTotals:
+    """Raw per-call accumulators; partial totals from repo shards merge losslessly."""
+
+    tool_calls: int = 0
+    ok_calls: int = 0
+    strict_bad_calls: int = 0
+    latencies: List[int] = field(default_factory=list)
+    noise_values: List[float] = field(default_factory=list)
+    token_saved_values: List[float] = field(default_factory=list)
+    worktree_pack_calls: int = 0
+    worktrees_returned_total: int = 0
+    worktrees_with_digest_total: int = 0
+    worktrees_dirty_total: int = 0
+    worktrees_with_touches_total: int = 0
+    worktrees_purpose_truncated_total: int = 0
+
+    def merge(self, other: ZooTotals) -> None:
+        self.tool_calls += other.tool_calls
+        self.ok_calls += other.ok_calls
+        self.strict_bad_calls += other.strict_bad_calls
+        self.latencies.extend(other.latencies)
+        self.noise_values.extend(other.noise_values)
+        self.token_saved_values.extend(other.token_saved_values)
+        self.worktree_pack_calls += other.worktree_pack_calls
+        self.worktrees_returned_total += other.worktrees_returned_total
+        self.worktrees_with_digest_total += other.worktrees_with_digest_total
+        self.worktrees_dirty_total += other.worktrees_dirty_total
+        self.worktrees_with_touches_total += other.worktrees_with_touches_total
+        self.worktrees_purpose_truncated_total += (
+            other.worktrees_purpose_truncated_total
+        )
+
+
+def accumulate(repos: Iterable[Dict[str, Any]]) -> ZooTotals:
     tool_calls = 0
     ok_calls = 0
     strict_bad_calls = 0
@@ -50,7 +147,6 @@ def summarize(report: Dict[str, Any]) -> ZooSummary:
 
     noise_values: List[float] = []
     token_saved_values: List[float] = []
-    token_saved_negative_calls = 0
 
     worktree_pack_calls = 0
     worktrees_returned_total = 0
@@ -60,15 +156,14 @@ def summarize(report: Dict[str, Any]) -> ZooSummary:
     worktrees_purpose_truncated_total = 0
 
     for repo in repos:
-        tools: Dict[str, Dict[str, Any]] = dict(repo.get("tools", {}))
+        tools: Dict[str, Dict[str, Any]] = repo.get("tools") or {}
         for tool_name, m in tools.items():
             tool_calls += 1
             ok = bool(m.get("ok", False))
             strict_ok = bool(m.get("strict_ok", False))
-            if ok:
-                ok_calls += 1
-                if not strict_ok:
-                    strict_bad_calls += 1
+            # bools are ints: count without branching (ok > strict_ok == ok, not strict).
+            ok_calls += ok
+            strict_bad_calls += ok > strict_ok
 
             latency = int(m.get("latency_ms", 0) or 0)
             latencies.append(latency)
@@ -83,10 +178,7 @@ def summarize(report: Dict[str, Any]) -> ZooSummary:
             saved = m.get("token_saved", None)
             if saved is not None:
                 try:
-                    v = float(saved)
-                    token_saved_values.append(v)
-                    if v < 0.0:
-                        token_saved_negative_calls += 1
+                    token_saved_values.append(float(saved))
                 except Exception:
                     pass
 
@@ -100,27 +192,75 @@ def summarize(report: Dict[str, Any]) -> ZooSummary:
                     m.get("worktrees_purpose_truncated", 0) or 0
                 )
 
-    latencies.sort()
-    latency_p50_ms = percentile(latencies, 50)
-    latency_p95_ms = percentile(latencies, 95)
-    latency_max_ms = latencies[-1] if latencies else 0
-
-    noise_defined_calls = len(noise_values)
-    noise_mean = (
-        (sum(noise_values) / noise_defined_calls) if noise_defined_calls > 0 else None
+    return ZooTotals(
+        tool_calls=tool_calls,
+        ok_calls=ok_calls,
+        strict_bad_calls=strict_bad_calls,
+        latencies=latencies,
+        noise_values=noise_values,
+        token_saved_values=token_saved_values,
+        worktree_pack_calls=worktree_pack_calls,
+        worktrees_returned_total=worktrees_returned_total,
+        worktrees_with_digest_total=worktrees_with_digest_total,
+        worktrees_dirty_total=worktrees_dirty_total,
+        worktrees_with_touches_total=worktrees_with_touches_total,
+        worktrees_purpose_truncated_total=worktrees_purpose_truncated_total,
     )
 
-    token_saved_defined_calls = len(token_saved_values)
-    token_saved_mean = (
-        (sum(token_saved_values) / token_saved_defined_calls)
-        if token_saved_defined_calls > 0
-        else None
+
+def iter_batches(
+    repos: Iterable[Dict[str, Any]], size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for repo in repos:
+        batch.append(repo)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def accumulate_parallel(repos: Iterable[Dict[str, Any]], workers: int) -> ZooTotals:
+    """Accumulate batches of repos on a process pool and merge the partial totals.
+
+    At most 2*workers batches are in flight, so a streamed report is never
+    buffered whole. Batches merge in submission order, keeping float sums (and
+    so the output) identical to the serial path.
+    """
+    totals = ZooTotals()
+    pending: Deque[Future[ZooTotals]] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for batch in iter_batches(repos, REPO_BATCH_SIZE):
+            if len(pending) >= 2 * workers:
+                totals.merge(pending.popleft().result())
+            pending.append(ex.submit(accumulate, batch))
+        while pending:
+            totals.merge(pending.popleft().result())
+    return totals
+
+
+def summarize(report: Dict[str, Any]) -> ZooSummary:
+    return summarize_repos(report.get("repos", []))
+
+
+def summarize_repos(repos: Iterable[Dict[str, Any]], workers: int = 1) -> ZooSummary:
+    t = accumulate(repos) if workers <= 1 else accumulate_parallel(repos, workers)
+
+    latency_p50_ms, latency_p95_ms, latency_max_ms = latency_stats(t.latencies)
+
+    noise_defined_calls = len(t.noise_values)
+    noise_mean, _ = mean_and_negatives(t.noise_values)
+
+    token_saved_defined_calls = len(t.token_saved_values)
+    token_saved_mean, token_saved_negative_calls = mean_and_negatives(
+        t.token_saved_values
     )
 
     return ZooSummary(
-        tool_calls=tool_calls,
-        ok_calls=ok_calls,
-        strict_bad_calls=strict_bad_calls,
+        tool_calls=t.tool_calls,
+        ok_calls=t.ok_calls,
+        strict_bad_calls=t.strict_bad_calls,
         latency_p50_ms=latency_p50_ms,
         latency_p95_ms=latency_p95_ms,
         latency_max_ms=latency_max_ms,
@@ -129,12 +269,12 @@ def summarize(report: Dict[str, Any]) -> ZooSummary:
         token_saved_defined_calls=token_saved_defined_calls,
         token_saved_mean=token_saved_mean,
         token_saved_negative_calls=token_saved_negative_calls,
-        worktree_pack_calls=worktree_pack_calls,
-        worktrees_returned_total=worktrees_returned_total,
-        worktrees_with_digest_total=worktrees_with_digest_total,
-        worktrees_dirty_total=worktrees_dirty_total,
-        worktrees_with_touches_total=worktrees_with_touches_total,
-        worktrees_purpose_truncated_total=worktrees_purpose_truncated_total,
+        worktree_pack_calls=t.worktree_pack_calls,
+        worktrees_returned_total=t.worktrees_returned_total,
+        worktrees_with_digest_total=t.worktrees_with_digest_total,
+        worktrees_dirty_total=t.worktrees_dirty_total,
+        worktrees_with_touches_total=t.worktrees_with_touches_total,
+        worktrees_purpose_truncated_total=t.worktrees_purpose_truncated_total,
     )
 
 
@@ -167,10 +307,16 @@ def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--current", required=True, help="Current zoo_report.json")
     ap.add_argument("--previous", required=True, help="Previous zoo_report.json")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to summarize each report (default: 1, in-process)",
+    )
     args = ap.parse_args()
 
-    cur = summarize(parse_report(args.current))
-    prev = summarize(parse_report(args.previous))
+    cur = summarize_repos(iter_report_repos(args.current), args.workers)
+    prev = summarize_repos(iter_report_repos(args.previous), args.workers)
 
     print_summary("current", cur)
     print_summary("previous", prev)